@@ -1,7 +1,110 @@
-import pygame, sys
+import pygame, sys, os
 from pygame.locals import *
 
 
+# Sheets that have already been loaded, keyed by absolute image path. Each entry holds the parsed meta, the decoded
+# image and the sheet of subsurfaces cut from it, so constructing the same sheet twice skips the disk and PNG decode.
+_sheet_cache = dict()
+
+
+def _parse_meta(path):
+    """Read the meta file path.meta into a list of (line index, key, values) tokens."""
+    meta = []
+    with open(path + '.meta', encoding='utf-8') as file:
+        # Stream the file line by line rather than reading it whole and splitting
+        for i, attribute in enumerate(file):
+            tokens = attribute.strip().split(' ')
+            meta.append((i, tokens[0], tokens[1:]))
+    return meta
+
+
+def _load_image(path, color_key):
+    """Load the image at path with per-pixel alpha, with color_key (if given) made transparent."""
+    if color_key is None:
+        return pygame.image.load(path).convert_alpha()
+    image = pygame.image.load(path).convert()
+    image.set_colorkey(color_key)
+    # Bake the color key into the alpha channel once, so blits don't compare every pixel against the key
+    return image.convert_alpha()
+
+
+# Meta key handlers. Each takes the sheet being built, the key's values and the line index, and is looked up by key in
+# one of the tables below instead of walking an if/elif chain for every line.
+
+def _h_noop(sheet, values, i):
+    """Comment or blank line, nothing to see here."""
+    pass
+
+
+def _h_echo(sheet, values, i):
+    """Echo to console, just for fun."""
+    print(' '.join(values))
+
+
+def _h_colorkey(sheet, values, i):
+    """Color key."""
+    sheet.color_key = (int(values[0]), int(values[1]), int(values[2]))
+
+
+def _h_sprite_sheet(sheet, values, i):
+    """Sprite sheet setup."""
+    sheet.sprite_w, sheet.sprite_h = int(values[0]), int(values[1])
+    if len(values) >= 3:
+        sheet.offset_w, sheet.offset_h = int(values[2]), int(values[3])
+    if len(values) >= 5:
+        sheet.border_w, sheet.border_h = int(values[4]), int(values[5])
+
+
+def _h_anim(sheet, values, i):
+    """Create an animation."""
+    if sheet.animations == None:
+        sheet.animations = dict()
+    animation = tuple(values[2:])
+    if len(animation) not in (2, 3, 4):
+        raise IndexError()
+    sheet.animations[values[0]] = [values[1], tuple(int(x) for x in animation)]
+
+
+def _h_fps(sheet, values, i):
+    """Fps setup."""
+    sheet.fps = int(values[0])
+
+
+def _h_tile_sheet(sheet, values, i):
+    """Tile sheet setup."""
+    sheet.tile_w, sheet.tile_h = int(values[0]), int(values[1])
+    if len(values) >= 3:
+        sheet.offset_w, sheet.offset_h = int(values[2]), int(values[3])
+    if len(values) >= 5:
+        sheet.border_w, sheet.border_h = int(values[4]), int(values[5])
+
+
+def _h_tile(sheet, values, i):
+    """Make a tile."""
+    if sheet.tiles == None:
+        sheet.tiles = dict()
+    if len(values) == 3:
+        sheet.tiles[values[0]] = (int(values[1]), int(values[2]))
+
+
+_SHEET_HANDLERS = {
+    '#': _h_noop, '': _h_noop,
+    'echo': _h_echo, '@': _h_echo,
+    'sheet': _h_sprite_sheet,
+    'key': _h_colorkey, 'colorkey': _h_colorkey, 'bg': _h_colorkey,
+    'anim': _h_anim, 'animation': _h_anim,
+    'fps': _h_fps,
+}
+
+_TILE_HANDLERS = {
+    '#': _h_noop, '': _h_noop,
+    'echo': _h_echo, '@': _h_echo,
+    'sheet': _h_tile_sheet,
+    'key': _h_colorkey, 'colorkey': _h_colorkey, 'bg': _h_colorkey,
+    'tile': _h_tile,
+}
+
+
 class SpriteSheet:
     """Create a sprite sheet based on an image and meta file.
     
@@ -52,48 +155,20 @@ class SpriteSheet:
     
     def init(self):
         """The actual construction of the sprite sheet."""
+        cached = _sheet_cache.get(os.path.abspath(self.file_path))
         i, key = 0, ''
         try:
-            # Load meta
-            with open(self.file_path + '.meta') as meta:
-                lines = meta.read().splitlines()
-                for i, attribute in enumerate(lines):
-                    # Add each attribute from meta into the SpriteSheet
-                    tokens = attribute.strip().split(' ')
-                    key = tokens[0]
-                    values = tokens[1:]
-                    # Switch on key
-                    if key == '#' or key == '':
-                        # Comment or blank line, nothing to see here
-                        pass
-                    elif key == 'echo' or key == '@':
-                        # Echo to console, just for fun
-                        print(' '.join(values))
-                    elif key == 'sheet':
-                        # Sheet setup
-                        self.sprite_w, self.sprite_h = int(values[0]), int(values[1])
-                        if len(values) >= 3:
-                            self.offset_w, self.offset_h = int(values[2]), int(values[3])
-                        if len(values) >= 5:
-                            self.border_w, self.border_h = int(values[4]), int(values[5])
-                    elif key == 'key' or key == 'colorkey' or key == 'bg':
-                        # Color key
-                        self.color_key = (int(values[0]), int(values[1]), int(values[2]))
-                    elif key == 'anim' or key == 'animation':
-                        # Create an animation
-                        if self.animations == None:
-                            self.animations = dict()
-                        animation = tuple(values[2:])
-                        if len(animation) not in (2, 3, 4):
-                            raise IndexError()
-                        self.animations[values[0]] = [values[1], tuple(int(x) for x in animation)]
-                    elif key == 'fps':
-                        # Fps setup
-                        self.fps = int(values[0])
-                    else:
-                        print('Error: Unrecognized key %s (line %d). Will try to continue, but there may be an issue with %s.meta.' % (key, i+1, self.file_path))
+            # Load meta, unless this sheet has been loaded before
+            meta = cached['meta'] if cached else _parse_meta(self.file_path)
+            for i, key, values in meta:
+                # Add each attribute from meta into the SpriteSheet
+                handler = _SHEET_HANDLERS.get(key)
+                if handler is not None:
+                    handler(self, values, i)
+                else:
+                    print('Error: Unrecognized key %s (line %d). Will try to continue, but there may be an issue with %s.meta.' % (key, i+1, self.file_path))
         except FileNotFoundError:
-            print('Error: No %s.meta file found!' % (file_path))
+            print('Error: No %s.meta file found!' % (self.file_path))
             sys.exit(1)
         except IndexError:
             print('Error: Line %d (key %s) in %s.meta may have the wrong number of arguments.' % (i+1, key, self.file_path))
@@ -105,41 +180,41 @@ class SpriteSheet:
             sys.exit(1)
             
         # Perform the actual initialization of the sprite sheet
-        if key == None:
-            image = pygame.image.load(self.file_path).convert_alpha()
-        else:
-            image = pygame.image.load(self.file_path).convert()
-            image.set_colorkey(self.color_key)
+        image = cached['image'] if cached else _load_image(self.file_path, self.color_key)
         
         image_w, image_h = image.get_size()
         self.w = (image_w + self.offset_w - 2*self.border_w) // (self.sprite_w + self.offset_w)
         self.h = (image_h + self.offset_h - 2*self.border_h) // (self.sprite_h + self.offset_h)
         
-        # Construct the sheet (2d list of Surfaces, technically subsurfaces)
-        self.sheet = []
-        for y in range(self.h):
-            self.sheet.append([])
-            for x in range(self.w):
-                rect = (self.border_w + x*(self.sprite_w + self.offset_w), self.border_h + y*(self.sprite_h + self.offset_h), \
-                    self.sprite_w, self.sprite_h)
-                self.sheet[y].append(image.subsurface(rect))
+        # Construct the sheet (flat row-major list of Surfaces, technically subsurfaces, so the sprite at row r and
+        # column c is sheet[r*w + c]), or reuse the cached one
+        if cached:
+            self.sheet = cached['sheet']
+        else:
+            # Every sprite sits on the same grid, so work out the column and row positions once and pair them up
+            sw, sh = self.sprite_w, self.sprite_h
+            stride_x, stride_y = sw + self.offset_w, sh + self.offset_h
+            xs = [self.border_w + x*stride_x for x in range(self.w)]
+            ys = [self.border_h + y*stride_y for y in range(self.h)]
+            subsurface = image.subsurface
+            self.sheet = [subsurface((x, y, sw, sh)) for y in ys for x in xs]
+            _sheet_cache[os.path.abspath(self.file_path)] = {'meta': meta, 'image': image, 'sheet': self.sheet}
         
         # Construct animations
-        for animation in self.animations:
+        for animation in self.animations or ():
             style = self.animations[animation][0]
             xs = self.animations[animation][1]
-            frames = []
+            w = self.w
             if len(xs) == 2:
-                frames.append((xs[0], xs[1]))
+                frames = (self.sheet[xs[0]*w + xs[1]],)
             elif len(xs) == 3:
-                r = xs[0]
-                for c in range(xs[1], xs[2]+1):
-                    frames.append((r, c))
+                # A strip is one contiguous run of the flat sheet, so it's a single slice
+                row = xs[0]*w
+                frames = tuple(self.sheet[row + xs[1]:row + xs[2]+1])
             elif len(xs) == 4:
-                for r in range(xs[0], xs[2]+1):
-                    for c in range(xs[1], xs[3]+1):
-                        frames.append((r, c))
-            self.animations[animation] = Animation([self.sheet[x[0]][x[1]] for x in frames], self.fps, style=style)
+                # A rectangle is one contiguous run per row, so it's a slice per row
+                frames = tuple(sprite for r in range(xs[0], xs[2]+1) for sprite in self.sheet[r*w + xs[1]:r*w + xs[3]+1])
+            self.animations[animation] = Animation(frames, self.fps, style=style)
     
     
     def __getitem__(self, k):
@@ -150,8 +225,9 @@ class SpriteSheet:
             sheet[k=str] will return the animation named k, if it exists, None if else
         """
         try:
-            if k < len(self.sheet):
-                return self.sheet[k]
+            if -self.h <= k < self.h:
+                row = k % self.h * self.w
+                return self.sheet[row:row + self.w]
             else:
                 return None
         except TypeError:
@@ -185,75 +261,53 @@ class TileSheet:
     
     def init(self):
         """The actual construction of the sprite sheet."""
+        cached = _sheet_cache.get(os.path.abspath(self.file_path))
         i, key = 0, ''
         try:
-            # Load meta
-            with open(self.file_path + '.meta') as meta:
-                lines = meta.read().splitlines()
-                for i, attribute in enumerate(lines):
-                    # Add each attribute from meta into the SpriteSheet
-                    tokens = attribute.strip().split(' ')
-                    key = tokens[0]
-                    values = tokens[1:]
-                    # Switch on key
-                    if key == '#' or key == '':
-                        # Comment or blank line, nothing to see here
-                        pass
-                    elif key == 'echo' or key == '@':
-                        # Echo to console, just for fun
-                        print(' '.join(values))
-                    elif key == 'sheet':
-                        # Sheet setup
-                        self.tile_w, self.tile_h = int(values[0]), int(values[1])
-                        if len(values) >= 3:
-                            self.offset_w, self.offset_h = int(values[2]), int(values[3])
-                        if len(values) >= 5:
-                            self.border_w, self.border_h = int(values[4]), int(values[5])
-                    elif key == 'key' or key == 'colorkey' or key == 'bg':
-                        # Color key
-                        self.color_key = (int(values[0]), int(values[1]), int(values[2]))
-                    elif key == 'tile':
-                        # Make a tile
-                        if self.tiles == None:
-                            self.tiles = dict()
-                        if len(values) == 3:
-                            self.tiles[value[0]] = tuple(int(values[1]), int(values[2]))
-                    else:
-                        print('Error: Unrecognized key %s (line %d). Will try to continue, but there may be an issue with %s.meta.' % (key, i+1, self.file_path))
+            # Load meta, unless this sheet has been loaded before
+            meta = cached['meta'] if cached else _parse_meta(self.file_path)
+            for i, key, values in meta:
+                # Add each attribute from meta into the TileSheet
+                handler = _TILE_HANDLERS.get(key)
+                if handler is not None:
+                    handler(self, values, i)
+                else:
+                    print('Error: Unrecognized key %s (line %d). Will try to continue, but there may be an issue with %s.meta.' % (key, i+1, self.file_path))
         except FileNotFoundError:
-            print('Error: No %s.meta file found!' % (file_path))
+            print('Error: No %s.meta file found!' % (self.file_path))
             sys.exit(1)
         except IndexError:
             print('Error: Line %d (key %s) in %s.meta may have the wrong number of arguments.' % (i+1, key, self.file_path))
             sys.exit(1)
         
         # Ensure that all the necessary variables exist
-        if not all([x is not None for x in [self.sprite_w, self.sprite_h]]):
+        if not all([x is not None for x in [self.tile_w, self.tile_h]]):
             print('Error: TileSheet variable missing (maybe meta is incomplete?).')
             sys.exit(1)
             
         # Perform the actual initialization of the sprite sheet
-        if key == None:
-            image = pygame.image.load(self.file_path).convert_alpha()
-        else:
-            image = pygame.image.load(self.file_path).convert()
-            image.set_colorkey(self.color_key)
+        image = cached['image'] if cached else _load_image(self.file_path, self.color_key)
         
         image_w, image_h = image.get_size()
         self.w = (image_w + self.offset_w - 2*self.border_w) // (self.tile_w + self.offset_w)
         self.h = (image_h + self.offset_h - 2*self.border_h) // (self.tile_h + self.offset_h)
         
-        # Construct the sheet (2d list of Surfaces, technically subsurfaces)
-        self.sheet = []
-        for y in range(self.h):
-            self.sheet.append([])
-            for x in range(self.w):
-                rect = (self.border_w + x*(self.sprite_w + self.offset_w), self.border_h + y*(self.sprite_h + self.offset_h), \
-                    self.sprite_w, self.sprite_h)
-                self.sheet[y].append(image.subsurface(rect))
+        # Construct the sheet (flat row-major list of Surfaces, technically subsurfaces, so the tile at row r and
+        # column c is sheet[r*w + c]), or reuse the cached one
+        if cached:
+            self.sheet = cached['sheet']
+        else:
+            # Every tile sits on the same grid, so work out the column and row positions once and pair them up
+            tw, th = self.tile_w, self.tile_h
+            stride_x, stride_y = tw + self.offset_w, th + self.offset_h
+            xs = [self.border_w + x*stride_x for x in range(self.w)]
+            ys = [self.border_h + y*stride_y for y in range(self.h)]
+            subsurface = image.subsurface
+            self.sheet = [subsurface((x, y, tw, th)) for y in ys for x in xs]
+            _sheet_cache[os.path.abspath(self.file_path)] = {'meta': meta, 'image': image, 'sheet': self.sheet}
         
         # Create all tiles
-        for tile in tiles:
+        for tile in self.tiles or ():
             pass
         
 
@@ -286,7 +340,7 @@ class Animation:
         cb_complete: callback function when animation is completed, should take this animation as an argument
         unit_per_s: time conversion as units/second, e.g. default is ms, so unit_time = 1000 milliseconds/second, seconds would be 1 second/second, etc.
         """
-        self.frames = list(frames)
+        self.frames = tuple(frames)
         self.fps = fps
         self.style = style
         self.cb_complete = cb_complete
@@ -294,10 +348,11 @@ class Animation:
         
         self.t = 0
         self.frame_delay = unit_per_s / fps
-        self.t_full = self.frame_delay * len(frames)
-        self.frame = frames[0]
-        self.start = frames[0]
-        self.end = frames[-1]
+        self.t_full = self.frame_delay * len(self.frames)
+        self.frame = self.frames[0]
+        self._cur_idx = 0  # Index of self.frame in self.frames
+        self.start = self.frames[0]
+        self.end = self.frames[-1]
         self.playing = False
         
     def play(self):
@@ -314,29 +369,35 @@ class Animation:
             return
         if self.style == Animation.RESET:
             self.t += dt
-            if self.t > self.t_full:
+            if self.t >= self.t_full:
                 self.frame = self.start
+                self._cur_idx = 0
                 self.pause()
                 self.on_complete()
             else:
-                self.frame = self.frames[int(self.t // self.frame_delay)]
+                self._cur_idx = int(self.t // self.frame_delay)
+                self.frame = self.frames[self._cur_idx]
         elif self.style == Animation.PAUSE:
             self.t += dt
-            if self.t > self.t_full:
+            if self.t >= self.t_full:
                 self.frame = self.end
+                self._cur_idx = len(self.frames) - 1
                 self.pause()
                 self.on_complete()
             else:
-                self.frame = self.frames[int(self.t // self.frame_delay)]
+                self._cur_idx = int(self.t // self.frame_delay)
+                self.frame = self.frames[self._cur_idx]
         elif self.style == Animation.LOOP:
             self.t += dt
             self.t %= self.t_full
-            self.frame = self.frames[int(self.t // self.frame_delay)]
+            self._cur_idx = int(self.t // self.frame_delay)
+            self.frame = self.frames[self._cur_idx]
     
     def reset(self):
         """Reset the animation until play is called."""
         self.t = 0
         self.frame = self.start
+        self._cur_idx = 0
         self.playing = False
     
     def on_complete(self):
@@ -357,10 +418,7 @@ class Animation:
         if k == 0:
             return self.frame
         else:
-            index = self.t // self.frame_delay
-            index += k
-            index %= len(self.frames)
-            return self.frames[int(index)]
+            return self.frames[(self._cur_idx + k) % len(self.frames)]
 
 
 class Animated:
@@ -413,5 +471,5 @@ if __name__ == '__main__':
         dt = clock.get_time()
         a.update(dt)
         screen.blit(+a, (10, 10))
+        # flip() presents the whole screen already, a following update() would just upload it a second time
         pygame.display.flip()
-        pygame.display.update()
@@ -37,8 +37,13 @@ class App:
                 if event.type == pygame.QUIT:
                     sys.exit(0)
                 self.focused.on_event(event)
+            # Collect every element's blits and hand them to pygame in one call
+            blit_list = []
             for element in self.elements:
-                element.on_render()
+                blits = element.on_render()
+                if blits:
+                    blit_list.extend(blits)
+            self.surface.blits(blit_list, doreturn=0)
             pygame.display.update()
 
         pygame.quit()
@@ -62,28 +67,43 @@ class Element:
     def on_event(self, event):
         pass
 
-    # Called when it's render time (should call self.parent.surface)
+    # Called when it's render time, returns a list of (surface, position) blits for the app to batch onto its surface
+    # (None if nothing to blit). Anything drawn straight onto self.parent.surface here lands below the batched blits
     def on_render(self):
         pass
 
 
 # An invisible keyboard receiver, stores in a buffer and sent on enter
 class InputBuffer(Element):
-    # Keys that may be typed
-    LEGAL_KEYS = 'abcdefghijklmnopqrstuvwxyz' +\
-                 'ABCDEFGIHJKLMNOPQRSTUVWXYZ' +\
-                 '1234567890' +\
-                 '!@#$%^&*()[]{}<>-_=+,./?;:\'\"|\\`~ '
-    # Keys that shouldn't add to the index in the buffer
-    ILLEGAL_KEYS = (K_LSHIFT, K_RSHIFT, K_LCTRL, K_RCTRL, K_LALT, K_RALT)
+    # Keys that may be typed, as a set so checking a keypress is a hash lookup rather than a scan of the string
+    LEGAL_KEYS = frozenset('abcdefghijklmnopqrstuvwxyz' +\
+                           'ABCDEFGIHJKLMNOPQRSTUVWXYZ' +\
+                           '1234567890' +\
+                           '!@#$%^&*()[]{}<>-_=+,./?;:\'\"|\\`~ ')
 
     def __init__(self, parent, send):
         super().__init__(parent)
 
         self.send = send
-        self.buffer = ''
+        # Characters are edited in place in a list, the string form is only joined when something asks for it
+        self.chars = []
+        self._joined = ''
+        self._dirty = False
         self.index = 0
 
+    # The buffer as a string, rejoined from self.chars only if they changed since the last time
+    @property
+    def buffer(self):
+        if self._dirty:
+            self._joined = ''.join(self.chars)
+            self._dirty = False
+        return self._joined
+
+    # Assigning the buffer is the same as set_buffer
+    @buffer.setter
+    def buffer(self, buffer):
+        self.set_buffer(buffer)
+
     # Receive key events, if focused
     def on_event(self, event):
         super().on_event(event)
@@ -94,20 +114,22 @@ class InputBuffer(Element):
             elif event.key == K_ESCAPE:
                 self.on_unfocus()
 
-            elif event.key == K_BACKSPACE and len(self.buffer) > 0 and self.index > 0:
+            elif event.key == K_BACKSPACE and len(self.chars) > 0 and self.index > 0:
                 # If backspace is pressed, try to delete the current key
-                self.buffer = self.buffer[:self.index-1] + self.buffer[self.index:]
+                del self.chars[self.index-1]
+                self._dirty = True
                 self.index -= 1
             elif event.key == K_LEFT:
                 # Allow leftward movement within the buffer
                 self.index = max(0, self.index - 1)
             elif event.key == K_RIGHT:
                 # Allow rightward movement within the buffer
-                self.index = min(len(self.buffer), self.index + 1)
+                self.index = min(len(self.chars), self.index + 1)
 
-            elif event.unicode in self.LEGAL_KEYS and event.key not in self.ILLEGAL_KEYS:
+            elif event.unicode in self.LEGAL_KEYS:
                 # Only add a key if it is within the legal keys
-                self.buffer = self.buffer[:self.index] + event.unicode + self.buffer[self.index:]
+                self.chars.insert(self.index, event.unicode)
+                self._dirty = True
                 self.index += 1
 
     # Send the current buffer, lose focus
@@ -121,13 +143,14 @@ class InputBuffer(Element):
     # On unfocus, clear the buffer as well
     def on_unfocus(self):
         super().on_unfocus()
-        self.buffer = ''
-        self.index = 0
+        self.set_buffer('')
 
     # Set the buffer externally
     def set_buffer(self, buffer):
-        self.buffer = buffer
-        self.index = len(self.buffer)
+        self.chars = list(buffer)
+        self._joined = buffer
+        self._dirty = False
+        self.index = len(self.chars)
 
 
 # A visible wrapper around an InputBuffer, activates when focused
@@ -144,8 +167,17 @@ class InputLine(InputBuffer):
         self.font = pygame.font.SysFont('Courier New, Courier, Arial', height)
         self.color_text = color_text
 
+        # Last rendered text, as (text, surface), so an unchanged line isn't re-rendered every frame
+        self._text_cache = (None, None)
+        # The font is monospaced, so the cursor is one pre-rendered underscore moved along by the width of a character
+        self._char_w = self.font.size(' ')[0]
+        self._cursor_surf = self.font.render('_', True, self.color_text)
+
     # Render the InputLine
     def on_render(self):
         if self.focused:
-            self.parent.surface.blit(self.font.render(self.cue + self.buffer, True, self.color_text), (self.x, self.y))
-            self.parent.surface.blit(self.font.render(''.join([' '] * (self.index + 1)) + '_', True, self.color_text), (self.x, self.y))
+            text = self.cue + self.buffer
+            if text != self._text_cache[0]:
+                self._text_cache = (text, self.font.render(text, True, self.color_text))
+            return [(self._text_cache[1], (self.x, self.y)),
+                    (self._cursor_surf, (self.x + self._char_w * (self.index + 1), self.y))]
@@ -2,12 +2,15 @@ import math
 
 
 class Vector2:
+    # Fixed attribute slots instead of a per-instance dict, vectors are small and made constantly
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x, self.y = x, y
 
     # Override abs to get the length
     def __abs__(self):
-        return math.sqrt(self.x**2 + self.y**2)
+        return math.hypot(self.x, self.y)
 
     # Get the length
     def mag(self):
@@ -97,6 +100,57 @@ class PointMass:
         return "PointMass(%f, %f)[mass %f, velocity (%f, %f)]" % (self.p.x, self.p.y, self.m, self.v.x, self.v.y)
 
 
+# Many point masses at once, stored as one flat list per component instead of a PointMass (and its Vector2s) each
+class World:
+    def __init__(self):
+        # Linear motion/mass: position, velocity, mass; mass i is at (px[i], py[i])
+        # (plain lists rather than array('d'), which has to box and unbox a float on every access from Python)
+        self.px, self.py = [], []
+        self.vx, self.vy = [], []
+        self.m = []
+        # Inverse masses, so applying a force multiplies instead of divides
+        self.inv_m = []
+
+    # Add a point mass at rest, returns its index
+    def add(self, x, y, m):
+        self.px.append(x)
+        self.py.append(y)
+        self.vx.append(0.0)
+        self.vy.append(0.0)
+        self.m.append(m)
+        self.inv_m.append(1/m)
+        return len(self.m) - 1
+
+    def __len__(self):
+        return len(self.m)
+
+    # Update every mass by time
+    def tick(self, delta_t):
+        tick_all(self.px, self.py, self.vx, self.vy, delta_t)
+
+    # Apply a force to every mass, fx and fy hold one component per mass
+    def apply_force(self, fx, fy, delta_t):
+        apply_force_all(self.vx, self.vy, fx, fy, self.inv_m, delta_t)
+
+    def __str__(self):
+        return "World[%d masses]" % (len(self))
+
+
+# Move n masses by their velocities over delta_t, given flat per-component lists
+def tick_all(px, py, vx, vy, delta_t):
+    for i in range(len(px)):
+        px[i] += delta_t * vx[i]
+        py[i] += delta_t * vy[i]
+
+
+# Accelerate n masses by forces (fx, fy) over delta_t, given flat per-component lists and inverse masses
+def apply_force_all(vx, vy, fx, fy, inv_m, delta_t):
+    for i in range(len(vx)):
+        a = delta_t * inv_m[i]
+        vx[i] += a * fx[i]
+        vy[i] += a * fy[i]
+
+
 # A solid body?
 class Body(PointMass):
     def __init__(self, x, y, m, ang):
@@ -119,10 +173,9 @@ class Body(PointMass):
         # Linear
         a = force * (1/self.m)
         self.v += delta_t * a
-        # Angular
+        # Angular, torque is the 2d cross product of lever arm and force (|r||F|sin(phi), but signed)
         lever_arm = p_force - self.p
-        phi = lever_arm.ang_to(force)
-        torque = math.sin(phi) * abs(force) * abs(lever_arm)
+        torque = lever_arm.x * force.y - lever_arm.y * force.x
         a = torque * (1/self.rm)
         self.rv += delta_t * a
 
@@ -1,19 +1,62 @@
-import pygame, math, sys
+import pygame, math, sys, functools, weakref
+from array import array
 from pygame.locals import *
 
 
+_TWO_PI = 2*math.pi
+
+# Lookup tables made by Smooth.tabulate, keyed by function then samples, shared between every animation that uses them.
+# Weakly keyed, so a function's tables go when the function does
+_tables = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=128)
+def _polynomial(cs):
+    """Smooth.polynomial for a tuple of coefficients, evaluated by Horner's rule."""
+    cs_reversed = cs[::-1]
+    def f(t):
+        acc = 0.0
+        for c in cs_reversed:
+            acc = acc*t + c
+        return acc
+    return f
+
+
+@functools.lru_cache(maxsize=128)
+def _inv_polynomial(cs):
+    """Smooth.inv_polynomial for a tuple of coefficients, with the exponents worked out up front."""
+    c0 = cs[0]
+    terms = tuple((c, 1/(1+i)) for i, c in enumerate(cs[1:]))
+    pow = math.pow
+    return lambda t: c0 + sum(c*pow(t, e) for c, e in terms)
+
+
+@functools.lru_cache(maxsize=128)
+def _g_arctan(k):
+    """Smooth.g_arctan for smoothing constant k."""
+    a = 1/(2*math.atan(k/2))
+    return lambda t, _atan=math.atan: a * _atan(k*(t-0.5)) + 0.5
+
+
+@functools.lru_cache(maxsize=128)
+def _g_bounce(k):
+    """Smooth.g_bounce for bounce amplitude k."""
+    return lambda t, _sin=math.sin, _two_pi=_TWO_PI: -_sin(_two_pi*t) / k + t
+
+
 class Smooth:
     """Holds various smoothing functions for easy access."""
     
     # Normal functions, no math required - just plug and play
+    # (math functions and constants are bound as default arguments, so calls don't look them up on the math module)
     
     linear = lambda t: t
-    sqrt = lambda t: math.sqrt(t)
-    sin = lambda t: math.sin(t * (math.pi / 2))
-    sigmoid = lambda t: 1.036 / (1 + math.e ** (4 - 8*t)) - 0.018
-    arctan = lambda t: 1/(2*math.atan(4)) * math.atan(8*t - 4) + 0.5
-    circle = lambda t: math.sqrt(2*t - t**2)
-    bounce = lambda t: -math.sin(2*math.pi*t) / 2 + t
+    sqrt = lambda t, _sqrt=math.sqrt: _sqrt(t)
+    sin = lambda t, _sin=math.sin, _half_pi=math.pi/2: _sin(t * _half_pi)
+    sigmoid = lambda t, _exp=math.exp: 1.036 / (1.0 + _exp(4.0 - 8.0*t)) - 0.018
+    arctan = lambda t, _atan=math.atan, _a=1/(2*math.atan(4)): _a * _atan(8*t - 4) + 0.5
+    circle = lambda t, _sqrt=math.sqrt: _sqrt(2*t - t*t)
+    bounce = lambda t, _sin=math.sin, _two_pi=_TWO_PI: -_sin(_two_pi*t) / 2 + t
     
     # Generalized function, some math required - plug, test, repeat, and play
     
@@ -22,29 +65,59 @@ class Smooth:
         
         cs: list of coefficients of t. The contribution of cs[i] to f is cs[i]*x^i.
         """
-        return lambda t: sum(c*t**i for i, c in enumerate(cs))
+        return _polynomial(tuple(cs))
         
     def inv_polynomial(cs=(0,0,1)):
         """Polynomial function based on inverse coefficients of t.
         
         cs: list of coefficients of t. The contribution of cs[i] to f is cs[i]*x^(1/i).
         """
-        return lambda t: cs[0] + sum(c*t**(1/(1+i)) for i, c in enumerate(cs[1:]))
+        return _inv_polynomial(tuple(cs))
         
     def g_arctan(k=6):
         """Generalized version of the arctan smoothing function. Author's note: personal favorite.
         
         k: smoothing constant. 6 is a good approximation of the sigmoid function.
         """
-        a = 1/(2*math.atan(k/2))
-        return lambda t: a * math.atan(k*(t-0.5)) + 0.5
+        return _g_arctan(k)
     
     def g_bounce(k):
         """Generalized version of the bounce function.
         
         k: bounce amplitude (kinda), f(t) -> t as k -> infinity, f(t) -> wild as k -> 0.
         """
-        return lambda t: -math.sin(2*math.pi*t) / k + t
+        return _g_bounce(k)
+    
+    # Lookup tables, trade a bit of accuracy for not calling the function every frame
+    
+    def tabulate(f, n=1024):
+        """Sample smoothing function f into a table, and return a function that interpolates the table instead.
+        
+        f: a function such that f(0) = 0, f(1) = 1, only ever called with t within [0, 1]
+        n: number of samples, evenly spaced over [0, 1]
+        
+        With 1024 samples the transcendental curves (sin, sigmoid, arctan, bounce and their generalized versions) stay
+        within about 2e-6 of f. linear is cheaper than a lookup already, and sqrt and circle are off by up to 1e-2 near
+        t = 0 where their slope is infinite, so those three are returned as they are.
+        """
+        if f is Smooth.linear or f is Smooth.sqrt or f is Smooth.circle:
+            return f
+        try:
+            by_n = _tables.setdefault(f, dict())
+        except TypeError:
+            # f can't be weakly referenced (a builtin, say), so its table isn't kept
+            by_n = dict()
+        if n not in by_n:
+            last = n - 1
+            table = array('d', (f(i / last) for i in range(n)))
+            def f_table(t):
+                x = t * last
+                i = int(x)
+                if i >= last:
+                    return table[last]
+                return table[i] + (x - i) * (table[i+1] - table[i])
+            by_n[n] = f_table
+        return by_n[n]
 
 
 class Vari:
@@ -73,11 +146,15 @@ class Vari:
         self.anims.add(anim)
         
     def update(self, dt):
-        spent = set()
+        # Only gather finished animations if there are any, most frames nothing finishes
+        spent = None
         for anim in self.anims:
             if not anim.update(dt):
-                spent |= {anim}
-        self.anims -= spent
+                if spent is None:
+                    spent = []
+                spent.append(anim)
+        if spent:
+            self.anims.difference_update(spent)
     
     def render(self):
         """Render the Vari. To be implemented in subclasses."""
@@ -98,7 +175,8 @@ class Anim:
     STRAIGHT = 'straight'   # Animation jumps to 0 when looping
     REVERSE = 'reverse'     # Animation plays in reverse when looping
     
-    def __init__(self, vari, v, q, t_play, f, loop=STRAIGHT, repeat=0, delay_start=0, delay_end=0):
+    def __init__(self, vari, v, q, t_play, f, loop=STRAIGHT, repeat=0, delay_start=0, delay_end=0, coalesce=False,
+                 tabulate=False):
         # Contained vari, variable to modify, end point, time required to play the animation forward once
         self.vari = vari
         self.v = v
@@ -112,49 +190,84 @@ class Anim:
         self.delay_start = delay_start
         self.delay_end = delay_end
         
-        # Time, end time, animation function, boolean if playing forward, boolean if currently playing.
+        # Time, end time, animation function, boolean if playing forward, boolean if currently playing. If tabulate is
+        # set, f is sampled into a table by Smooth.tabulate rather than called every update
         self.t = 0
         self.t_end = delay_start + t_play + delay_end
-        self.f_anim = lerp(vari[v], q, delay_start, delay_start+t_play, f)
+        self.f_anim = lerp(vari[v], q, delay_start, delay_start+t_play, Smooth.tabulate(f) if tabulate else f)
         self.play_forward = True
         self.playing = True
+        
+        # Coalescing: for variables only ever drawn as whole numbers (like a Circle's radius), skip writing values that
+        # round to what was last written. The final value is always written.
+        self.coalesce = coalesce
+        if coalesce:
+            try:
+                iter(vari[v])
+            except TypeError:
+                self._round = int
+            else:
+                self._round = lambda value: tuple([int(x) for x in value])
+            self._last_written = self._round(vari[v])
+        
+        # The loop type won't change, so pick its update once instead of checking it on every update (kept unbound, a
+        # bound method stored on self would be a reference cycle)
+        self._step = Anim._update_reverse if loop == Anim.REVERSE else Anim._update_straight
     
     def update(self, dt):
-        """Update the animation values based on the change in time dt."""
-        if not self.playing:
-            return False
-        if self.loop == Anim.STRAIGHT:
-            self.t += dt
-            if self.t > self.t_end:
-                self.repeat -= 1
-                if self.repeat < 0:
-                    # Break at the end of the animation
-                    self.vari[self.v] = self.f_anim(self.t_end)
-                    self.playing = False
-                    return False
-                else:
-                    self.t %= self.t_end
-        elif self.loop == Anim.REVERSE:
-            self.t += dt if self.play_forward else -dt
-            if self.t > self.t_end or self.t < 0:
-                # A single forward or backward play of a reversing animation counts as one-half of a repetition
-                self.repeat -= 0.5
-                if self.repeat < 0 and self.play_forward:
-                    # Break at the end of the animation
-                    self.vari[self.v] = self.f_anim(self.t_end)
-                    self.playing = False
-                    return False
-                elif self.repeat < 0 and not self.play_forward:
-                    # Break at the start of the animation
-                    self.vari[self.v] = self.f_anim(0)
-                    self.playing = False
-                    return False
-                elif self.play_forward:
-                    self.t = self.t_end - (self.t - self.t_end)
-                elif not self.play_forward:
-                    self.t = -self.t
-                self.play_forward = not self.play_forward
-        self.vari[self.v] = self.f_anim(self.t)
+        """Update the animation values based on the change in time dt. Returns False once the animation is done."""
+        return self._step(self, dt) if self.playing else False
+    
+    def _unchanged(self, value):
+        """Check if value rounds to the value last written, remembering it if not."""
+        rounded = self._round(value)
+        if rounded == self._last_written:
+            return True
+        self._last_written = rounded
+        return False
+    
+    def _update_straight(self, dt):
+        """Update a STRAIGHT animation."""
+        t, t_end = self.t + dt, self.t_end
+        if t > t_end:
+            self.repeat -= 1
+            if self.repeat < 0:
+                # Break at the end of the animation
+                self.t = t
+                self.vari[self.v] = self.f_anim(t_end)
+                self.playing = False
+                return False
+            t %= t_end
+        self.t = t
+        value = self.f_anim(t)
+        if self.coalesce and self._unchanged(value):
+            return True
+        self.vari[self.v] = value
+        return True
+    
+    def _update_reverse(self, dt):
+        """Update a REVERSE animation."""
+        t, t_end, play_forward = self.t, self.t_end, self.play_forward
+        t += dt if play_forward else -dt
+        if t > t_end or t < 0:
+            # A single forward or backward play of a reversing animation counts as one-half of a repetition
+            self.repeat -= 0.5
+            if self.repeat < 0:
+                # Break at the end of the animation if playing forward, at the start if playing backward
+                self.t = t
+                self.vari[self.v] = self.f_anim(t_end if play_forward else 0)
+                self.playing = False
+                return False
+            elif play_forward:
+                t = t_end - (t - t_end)
+            else:
+                t = -t
+            self.play_forward = not play_forward
+        self.t = t
+        value = self.f_anim(t)
+        if self.coalesce and self._unchanged(value):
+            return True
+        self.vari[self.v] = value
         return True
         
 
@@ -168,6 +281,53 @@ def SeqAnim(Anim):
         pass
     
 
+class AnimPool:
+    """Many one-shot animations, kept as columns and advanced together.
+    
+    For lots of fire-and-forget easings (no looping or repeating), instead of an Anim per animation and a method call
+    per animation every frame. Each animation's vari, variable, time, end time and lerp function sit in parallel
+    columns, advanced by a single loop in update.
+    """
+    
+    def __init__(self):
+        self.varis = []
+        self.vs = []
+        self.f_anims = []
+        self.ts = []
+        self.t_ends = []
+    
+    def __len__(self):
+        return len(self.ts)
+    
+    def add(self, vari, v, q, t_play, f, delay_start=0, delay_end=0, tabulate=False):
+        """Animate vari[v] to q, same as Anim(vari, v, q, t_play, f, ...) with the same keyword arguments would."""
+        self.varis.append(vari)
+        self.vs.append(v)
+        self.f_anims.append(lerp(vari[v], q, delay_start, delay_start+t_play, Smooth.tabulate(f) if tabulate else f))
+        self.ts.append(0.0)
+        self.t_ends.append(delay_start + t_play + delay_end)
+    
+    def update(self, dt):
+        """Update every animation by the change in time dt, dropping the ones that have finished."""
+        varis, vs, f_anims, ts, t_ends = self.varis, self.vs, self.f_anims, self.ts, self.t_ends
+        spent = False
+        for i in range(len(ts)):
+            t = ts[i] + dt
+            ts[i] = t
+            if t > t_ends[i]:
+                # Finish at the end of the animation
+                t = t_ends[i]
+                spent = True
+            varis[i][vs[i]] = f_anims[i](t)
+        if spent:
+            keep = [i for i in range(len(ts)) if ts[i] <= t_ends[i]]
+            self.varis = [varis[i] for i in keep]
+            self.vs = [vs[i] for i in keep]
+            self.f_anims = [f_anims[i] for i in keep]
+            self.ts = [ts[i] for i in keep]
+            self.t_ends = [t_ends[i] for i in keep]
+    
+
 class Circle(Vari):
     """A circle with center C and radius R. Rendered with color COLOR and width WIDTH (0=filled)."""
     C = 'x'
@@ -182,8 +342,19 @@ class Circle(Vari):
     
     def render(self):
         """Render the circle to self.surface."""
-        pygame.draw.circle(surface, self[Circle.COLOR], (int(self[Circle.C][0]), int(self[Circle.C][1])),\
-                           int(self[Circle.R]), self[Circle.WIDTH])
+        v = self.vars
+        x, y = v[Circle.C]
+        pygame.draw.circle(self.surface, v[Circle.COLOR], (int(x), int(y)), int(v[Circle.R]), v[Circle.WIDTH])
+
+
+def render_all(circles):
+    """Render every circle in circles, with the lookups render would repeat per circle done once."""
+    draw_circle = pygame.draw.circle
+    c, r, color, width = Circle.C, Circle.R, Circle.COLOR, Circle.WIDTH
+    for circle in circles:
+        v = circle.vars
+        x, y = v[c]
+        draw_circle(circle.surface, v[color], (int(x), int(y)), int(v[r]), v[width])
 
 
 def interpolate(p, q, t, f):
@@ -197,7 +368,8 @@ def interpolate(p, q, t, f):
         iter(p), iter(q)
     except TypeError:
         return p + f(t) * (q-p)
-    return tuple([p[i] + f(t) * (q[i]-p[i]) for i in range(len(p))])
+    u = f(t)
+    return tuple([p[i] + u * (q[i]-p[i]) for i in range(len(p))])
 
 
 def lerp(p, q, t_min, t_max, f):
@@ -210,7 +382,44 @@ def lerp(p, q, t_min, t_max, f):
     t_min, t_max: starting/ending time for interpolation
     f: a function such that f(0) = 0, f(1) = 1
     """
-    return lambda t: interpolate(p, q, (max(t_min, min(t_max, t))-t_min) / (t_max-t_min), f)
+    # Clamp t with plain comparisons and scale it by the reciprocal of the span, rather than calling min and max and
+    # dividing on every call
+    inv_span = 1.0 / (t_max-t_min)
+    # p and q can't change, so decide once whether they're numbers or vectors and work out q - p up front, leaving
+    # only the smoothing and one multiply-add per component for every call
+    try:
+        iter(p), iter(q)
+    except TypeError:
+        d = q - p
+        def lerp_1d(t):
+            if t < t_min:
+                t = t_min
+            elif t > t_max:
+                t = t_max
+            return p + f((t-t_min) * inv_span) * d
+        return lerp_1d
+    if len(p) == 2:
+        # 2d points are the common case, so unroll them
+        p0, p1 = p
+        d0, d1 = q[0] - p0, q[1] - p1
+        def lerp_2d(t):
+            if t < t_min:
+                t = t_min
+            elif t > t_max:
+                t = t_max
+            u = f((t-t_min) * inv_span)
+            return (p0 + u*d0, p1 + u*d1)
+        return lerp_2d
+    n = len(p)
+    dq = tuple(q[i] - p[i] for i in range(n))
+    def lerp_nd(t):
+        if t < t_min:
+            t = t_min
+        elif t > t_max:
+            t = t_max
+        u = f((t-t_min) * inv_span)
+        return tuple([p[i] + u*dq[i] for i in range(n)])
+    return lerp_nd
 
 
 # Test
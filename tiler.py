@@ -39,8 +39,10 @@ class TilerEnvironment:
     wmap, hmap = 0, 0
     wtile, htile = 0, 0
 
-    def __init__(self, tile_factory):
+    # If share_tiles is set, tile_factory is called once per tile id and every cell with that id gets the same object
+    def __init__(self, tile_factory, share_tiles=False):
         self.tile_factory = tile_factory
+        self.share_tiles = share_tiles
 
     # Load a file into this environment
     def load(self, file_path):
@@ -53,49 +55,61 @@ class TilerEnvironment:
             self.wmap, self.hmap = 0, 0
             self.wtile, self.htile = 0, 0
             return
+        # Each key's handler, looked up once per line rather than walking an if/elif chain
+        handlers = {'name': self._h_name, 'dmap': self._h_dmap, 'dtile': self._h_dtile,
+                    'file': self._h_file, 'tile': self._h_tile, 'layer': self._h_layer}
         with open(file_path) as file:
             data = file.read().splitlines()
             for pair in data:
-                key, value = pair.split(':', 1)
-                if key == 'name':
-                    self.name = value
-                elif key == 'dmap':
-                    self.wmap, self.hmap = value.split(',', 1)
-                    self.wmap, self.hmap = int(self.wmap), int(self.hmap)
-                elif key == 'dtile':
-                    self.wtile, self.htile = value.split(',', 1)
-                    self.wtile, self.htile = int(self.wtile), int(self.htile)
-                elif key == 'file':
-                    file_id, filepath = value.split(',', 1)
-                    self.files[file_id] = load_tiles(filepath, self.wtile, self.htile)
-                elif key == 'tile':
-                    tile_id, file_id, x, y, tile_type = value.split(',', 4)
-                    x, y = int(x), int(y)
-                    self.tiles[tile_id] = (file_id, x, y, tile_type)
-                elif key == 'layer':
-                    layer_id, layer_str = value.split(',', 1)
-                    self.layers[layer_id] = [[] for y in range(self.hmap)]
-                    for i, c in enumerate(layer_str):
-                        y = i // self.wmap
-                        if c == ' ':
-                            self.layers[layer_id][y].append(None)
-                        else:
-                            self.layers[layer_id][y].append(self.tile_factory(self.tiles[c]))
+                key, _, value = pair.partition(':')
+                handler = handlers.get(key)
+                if handler is not None:
+                    handler(value)
             print('loaded %s' % (file_path))
 
+    # Handlers for each .tlr key, given everything after the colon
+    def _h_name(self, value):
+        self.name = value
+
+    def _h_dmap(self, value):
+        self.wmap, self.hmap = map(int, value.split(',', 1))
+
+    def _h_dtile(self, value):
+        self.wtile, self.htile = map(int, value.split(',', 1))
+
+    def _h_file(self, value):
+        file_id, filepath = value.split(',', 1)
+        self.files[file_id] = load_tiles(filepath, self.wtile, self.htile)
+
+    def _h_tile(self, value):
+        tile_id, file_id, x, y, tile_type = value.split(',', 4)
+        self.tiles[tile_id] = (file_id, int(x), int(y), tile_type)
+
+    def _h_layer(self, value):
+        layer_id, layer_str = value.split(',', 1)
+        # Cut the layer into map rows up front, instead of working out the row of every character
+        rows = [layer_str[y*self.wmap:(y+1)*self.wmap] for y in range(self.hmap)]
+        tiles, factory = self.tiles, self.tile_factory
+        # Tile ids are single characters, so look their tiles up by character code in a list rather than hashing into
+        # self.tiles for every cell. Blanks have no entry and stay None (an unknown id still raises a KeyError here)
+        lookup = [None] * (max(map(ord, layer_str), default=0) + 1)
+        for c in set(layer_str) - {' '}:
+            lookup[ord(c)] = factory(tiles[c]) if self.share_tiles else tiles[c]
+        if self.share_tiles:
+            self.layers[layer_id] = [[lookup[ord(c)] for c in row] for row in rows]
+        else:
+            self.layers[layer_id] = [[None if c == ' ' else factory(lookup[ord(c)]) for c in row] for row in rows]
+
 
 # Load tile images from a file as a 2d list
 def load_tiles(file, width, height, x_offset=0, y_offset=0):
     image = pygame.image.load(file).convert()
     image_w, image_h = image.get_size()
-    tiles = []
-    for y in range(0, image_h // height):
-        row = []
-        tiles.append(row)
-        for x in range(0, image_w // width):
-            tile = (x*width + x*x_offset, y*height + y*y_offset, width, height)
-            row.append(image.subsurface(tile))
-    return tiles
+    # Distance from one tile to the next, worked out once rather than per tile
+    sx, sy = width + x_offset, height + y_offset
+    cols, rows = image_w // width, image_h // height
+    subsurface = image.subsurface
+    return [[subsurface((x*sx, y*sy, width, height)) for x in range(cols)] for y in range(rows)]
 
 
 if __name__ == '__main__':
@@ -121,27 +135,37 @@ if __name__ == '__main__':
             self.parent = parent
             self.tileset = False
             self.tile = False
+            
+            # The grid dots and separator lines never change, so draw them once onto a transparent overlay
+            self.overlay = pygame.Surface(self.parent.surface.get_size(), pygame.SRCALPHA)
+            pygame.draw.line(self.overlay, (255,255,255), (256,0), (256,500-17))
+            for y in range(16):
+                for x in range(16):
+                    pygame.draw.circle(self.overlay, (255,255,255), (x*16, y*16), 0)
+            pygame.draw.line(self.overlay, (255,255,255), (0, 500-17), (800, 500-17))
         
         def set_tileset(self, tileset):
             self.tileset = tileset
+            # Composite the whole tileset onto one surface now, so each frame is a single blit instead of one per tile
+            w, h = tileset.twidth, tileset.theight
+            self.tileset_surface = pygame.Surface((w*tileset.width, h*tileset.height)).convert()
+            self.tileset_surface.blits([(tile, (x*w, y*h)) for y, row in enumerate(tileset.tiles)
+                                        for x, tile in enumerate(row)], doreturn=0)
         
         def set_tile(self, tile):
             self.tile = tile
+            # Scale the selected tile up once, here, rather than every frame in on_render
+            w, h = self.tileset.twidth, self.tileset.theight
+            self.tile_scaled = pygame.transform.scale(tile, (4*w, 4*h)).convert()
         
         def on_render(self):
             if self.tileset:
-                for y, row in enumerate(self.tileset.tiles):
-                    for x, tile in enumerate(row):
-                        self.parent.surface.blit(tile, (x*self.tileset.twidth, y*self.tileset.theight))
+                self.parent.surface.blit(self.tileset_surface, (0, 0))
             if self.tile:
                 w = self.tileset.twidth
                 h = self.tileset.theight
-                self.parent.surface.blit(pygame.transform.scale(tile, (4*w, 4*h)), (128-2*w, 256+128-2*h, 4*w, 4*h))
-            pygame.draw.line(self.parent.surface, (255,255,255), (256,0), (256,500-17))
-            for y in range(16):
-                for x in range(16):
-                    pygame.draw.circle(self.parent.surface, (255,255,255), (x*16, y*16), 0)
-            pygame.draw.line(self.parent.surface, (255,255,255), (0, 500-17), (800, 500-17))
+                self.parent.surface.blit(self.tile_scaled, (128-2*w, 256+128-2*h))
+            self.parent.surface.blit(self.overlay, (0, 0))
     
     class ModApp(App):
         def __init__(self, width, height):